@@ -2,9 +2,8 @@
 
 from collections import defaultdict
 from functools import partial
-from itertools import chain, filterfalse
+from itertools import filterfalse
 
-from pkgcore.ebuild import misc
 from pkgcore.ebuild import profiles as profiles_mod
 from pkgcore.restrictions import packages
 from snakeoil.cli import arghparse
@@ -86,16 +85,18 @@ class ArchesAddon(base.Addon):
 class KeywordsAddon(base.Addon):
     """Addon supporting various keywords sets."""
 
+    # Note: '*' and '~*' are portage-only, i.e. not in the spec, so they
+    # don't belong in the main tree.
+    portage = frozenset(["*", "~*"])
+
     def __init__(self, *args):
         super().__init__(*args)
-        special = {"-*"}
         self.arches: frozenset[str] = self.options.target_repo.known_arches
-        unstable = {"~" + x for x in self.arches}
-        disabled = {"-" + x for x in chain(self.arches, unstable)}
-        self.valid = special | self.arches | unstable | disabled
-        # Note: '*' and '~*' are portage-only, i.e. not in the spec, so they
-        # don't belong in the main tree.
-        self.portage = {"*", "~*"}
+        valid = {"-*"}
+        valid.update(self.arches)
+        for arch in self.arches:
+            valid.update(("~" + arch, "-" + arch, "-~" + arch))
+        self.valid = frozenset(valid)
 
 
 class StableArchesAddon(base.Addon):
@@ -176,6 +177,12 @@ class UseAddon(base.Addon):
         else:
             c_implicit_iuse = set()
 
+        # group profile names by effective IUSE since most profiles share it
+        iuse_effective_groups = defaultdict(list)
+        for p in self.profiles:
+            iuse_effective_groups[p.iuse_effective].append(p.name)
+        self._iuse_effective_groups = tuple(iuse_effective_groups.items())
+
         known_iuse = set()
         known_iuse_expand = set()
 
@@ -185,10 +192,8 @@ class UseAddon(base.Addon):
                 flag for flags in repo.config.use_expand_desc.values() for flag, desc in flags
             )
 
-        self.collapsed_iuse = misc.non_incremental_collapsed_restrict_to_data(
-            ((packages.AlwaysTrue, known_iuse),),
-            ((packages.AlwaysTrue, known_iuse_expand),),
-        )
+        # all known flags apply to every package, only local flags vary
+        self._global_iuse = frozenset(known_iuse | known_iuse_expand)
         self.global_iuse = frozenset(known_iuse)
         self.global_iuse_expand = frozenset(known_iuse_expand)
         self.global_iuse_implicit = frozenset(c_implicit_iuse)
@@ -200,7 +205,7 @@ class UseAddon(base.Addon):
             )
 
     def allowed_iuse(self, pkg):
-        return self.collapsed_iuse.pull_data(pkg).union(pkg.local_use)
+        return self._global_iuse.union(pkg.local_use)
 
     def get_filter(self, attr=None):
         if self.ignore:
@@ -213,26 +218,23 @@ class UseAddon(base.Addon):
     def fake_use_validate(klasses, pkg, seq, attr=None):
         return {k: () for k in iflatten_instance(seq, klasses)}, ()
 
-    def _flatten_restricts(self, nodes, skip_filter, stated, unstated, attr, restricts=None):
+    def _flatten_restricts(self, nodes, skip_filter, stated, unstated, attr, restricts=()):
         for node in nodes:
-            k = node
-            v = restricts if restricts is not None else []
             if isinstance(node, packages.Conditional):
                 # invert it; get only whats not in pkg.iuse
                 unstated.update(filterfalse(stated.__contains__, node.restriction.vals))
-                v.append(node.restriction)
                 yield from self._flatten_restricts(
                     iflatten_instance(node.payload, skip_filter),
                     skip_filter,
                     stated,
                     unstated,
                     attr,
-                    v,
+                    restricts + (node.restriction,),
                 )
                 continue
             elif attr == "required_use":
                 unstated.update(filterfalse(stated.__contains__, node.vals))
-            yield k, tuple(v)
+            yield node, restricts
 
     def _unstated_iuse(self, pkg, attr, unstated_iuse):
         """Determine if packages use unstated IUSE for a given attribute."""
@@ -240,9 +242,9 @@ class UseAddon(base.Addon):
         if self.profiles:
             profiles_unstated = defaultdict(set)
             if attr is not None:
-                for p in self.profiles:
-                    if profile_unstated := unstated_iuse - p.iuse_effective:
-                        profiles_unstated[tuple(sorted(profile_unstated))].add(p.name)
+                for iuse_effective, names in self._iuse_effective_groups:
+                    if profile_unstated := unstated_iuse - iuse_effective:
+                        profiles_unstated[tuple(sorted(profile_unstated))].update(names)
 
             for unstated, profiles in profiles_unstated.items():
                 profiles = sorted(profiles)
@@ -310,13 +312,10 @@ def init_addon(cls, options, addons_map=None, **kwargs):
     except KeyError:
         # initialize and inject all required addons for a given addon's inheritance
         # tree as kwargs
-        required_addons = chain.from_iterable(
-            x.required_addons for x in cls.__mro__ if issubclass(x, base.Addon)
-        )
         kwargs.update(
             {
                 base.param_name(addon): init_addon(addon, options, addons_map)
-                for addon in required_addons
+                for addon in cls._all_required_addons
             }
         )
 
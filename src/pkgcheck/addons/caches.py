@@ -79,11 +79,19 @@ class CachedAddon(Addon):
         dirname = f"{repo.repo_id.lstrip(os.sep)}-{token}"
         return pjoin(self.options.cache_dir, "repos", dirname, self.cache.file)
 
+    def _load(self, f):
+        """Deserialize cache data from a given binary file object."""
+        return pickle.load(f)
+
+    def _dump(self, data, f):
+        """Serialize cache data to a given binary file object."""
+        pickle.dump(data, f, protocol=-1)
+
     def load_cache(self, path, fallback=None):
         cache = fallback
         try:
             with open(path, "rb") as f:
-                cache = pickle.load(f)
+                cache = self._load(f)
             if cache.version != self.cache.version:
                 logger.debug("forcing %s cache regen due to outdated version", self.cache.type)
                 os.remove(path)
@@ -102,7 +110,7 @@ class CachedAddon(Addon):
         try:
             os.makedirs(os.path.dirname(path), exist_ok=True)
             with AtomicWriteFile(path, binary=True) as f:
-                pickle.dump(data, f, protocol=-1)
+                self._dump(data, f)
         except IOError as e:
             msg = f"failed dumping {self.cache.type} cache: {path!r}: {e.strerror}"
             raise PkgcheckUserException(msg)
@@ -34,16 +34,36 @@ from ..log import logger
 from . import caches
 
 
-@dataclass(frozen=True, eq=False)
 class GitCommit:
     """Git commit objects."""
 
-    hash: str
-    commit_time: int
-    author: str
-    committer: str
-    message: tuple
-    pkgs: ImmutableDict = ImmutableDict()
+    __slots__ = ("hash", "commit_time", "author", "committer", "message", "pkgs")
+
+    def __init__(self, hash, commit_time, author, committer, message, pkgs=ImmutableDict()):
+        sf = object.__setattr__
+        sf(self, "hash", hash)
+        sf(self, "commit_time", commit_time)
+        sf(self, "author", author)
+        sf(self, "committer", committer)
+        sf(self, "message", message)
+        sf(self, "pkgs", pkgs)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"cannot assign to field {name!r}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"cannot delete field {name!r}")
+
+    def __getstate__(self):
+        return tuple(getattr(self, x) for x in GitCommit.__slots__)
+
+    def __setstate__(self, state):
+        # restore fields bypassing the immutability guard
+        for name, value in zip(GitCommit.__slots__, state):
+            object.__setattr__(self, name, value)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(hash={self.hash!r})"
 
     def __str__(self):
         return self.hash
@@ -102,10 +122,15 @@ class GitConfig:
 
 
 class GitLog:
-    """Iterator for decoded `git log` line output."""
+    """Iterator for decoded, NUL-delimited `git log` output fields."""
+
+    # amount of data to pull from the git log pipe per read
+    _chunk_size = 65536
 
     def __init__(self, cmd, path):
         self._running = False
+        self._fields = deque()
+        self._remainder = b""
         self.git_config = GitConfig()
         self.proc = subprocess.Popen(
             cmd,
@@ -119,22 +144,28 @@ class GitLog:
         return self
 
     def __next__(self):
-        # use replacement character for non-UTF8 decoding issues (issue #166)
-        line = self.proc.stdout.readline().decode("utf-8", "replace")
+        while not self._fields:
+            data = self.proc.stdout.read1(self._chunk_size)
+
+            # verify git log is running as expected after pulling the first chunk
+            if not self._running:
+                if self.proc.poll() or not data:
+                    error = self.proc.stderr.read().decode().strip()
+                    raise GitError(f"failed running git log: {error}")
+                self._running = True
+                self.git_config.close()
+
+            # EOF has been reached when read1() returns an empty string
+            if not data:
+                # reap the drained process so it doesn't linger as a zombie
+                self.proc.wait()
+                raise StopIteration
+
+            *fields, self._remainder = (self._remainder + data).split(b"\x00")
+            self._fields.extend(fields)
 
-        # verify git log is running as expected after pulling the first line
-        if not self._running:
-            if self.proc.poll() or not line:
-                error = self.proc.stderr.read().decode().strip()
-                raise GitError(f"failed running git log: {error}")
-            self._running = True
-            self.git_config.close()
-
-        # EOF has been reached when readline() returns an empty string
-        if not line:
-            raise StopIteration
-
-        return line.rstrip()
+        # use replacement character for non-UTF8 decoding issues (issue #166)
+        return self._fields.popleft().decode("utf-8", "replace")
 
 
 class _ParseGitRepo:
@@ -143,7 +174,7 @@ class _ParseGitRepo:
     # git command to run on the targeted repo
     _git_cmd = "git log --name-status --diff-filter=ARMD -z"
 
-    # custom git log format lines, see the "PRETTY FORMATS" section of
+    # custom git log format fields, see the "PRETTY FORMATS" section of
     # the git log man page for details
     _format = ()
 
@@ -153,11 +184,13 @@ class _ParseGitRepo:
     def __init__(self, path, commit_range):
         self.path = os.path.realpath(path)
         cmd = shlex.split(self._git_cmd)
-        cmd.append(f"--pretty=tformat:%n{'%n'.join(self._format)}")
+        # each commit record starts with an empty field and its format fields
+        # are NUL-separated, matching the file changes output from -z
+        cmd.append(f"--pretty=tformat:%x00{'%x00'.join(self._format)}")
         cmd.append(commit_range)
 
         self.git_log = GitLog(cmd, self.path)
-        # discard the initial newline
+        # discard the initial record separator
         next(self.git_log)
 
     def __iter__(self):
@@ -169,9 +202,10 @@ class _ParseGitRepo:
     @property
     def changes(self):
         """Generator of file change status with changed packages."""
-        changes = deque(next(self.git_log).strip("\x00").split("\x00"))
+        # file changes run until the next record separator or EOF
+        changes = deque(takewhile(bool, self.git_log))
         while changes:
-            status = changes.popleft()
+            status = changes.popleft().lstrip("\n")
             if status.startswith("R"):
                 # matched R status change
                 status = "R"
@@ -211,7 +245,10 @@ class GitRepoCommits(_ParseGitRepo):
         commit_time = int(next(self.git_log))
         author = next(self.git_log)
         committer = next(self.git_log)
-        message = list(takewhile(lambda x: x != "\x00", self.git_log))
+        message = next(self.git_log).split("\n")
+        if not message[-1]:
+            message.pop()
+        message = [x.rstrip() for x in message]
         pkgs = defaultdict(set)
         for status, atoms in self.changes:
             if status == "R":
@@ -242,7 +279,7 @@ class GitRepoPkgs(_ParseGitRepo):
                 return self._pkgs.popleft()
             except IndexError:
                 commit_hash = next(self.git_log)
-                commit_time = int(next(self.git_log).rstrip("\x00"))
+                commit_time = int(next(self.git_log))
                 self._pkg_changes(commit_hash, commit_time)
 
     def _pkg_changes(self, commit_hash, commit_time):
@@ -339,6 +376,8 @@ class GitRemovedRepo(GitChangedRepo):
 class _ScanGit(argparse.Action):
     """Argparse action that enables scanning against git commits or staged changes."""
 
+    _eclass_re = re.compile(r"^eclass/(?P<eclass>\S+)\.eclass$")
+
     def __init__(self, *args, staged=False, **kwargs):
         super().__init__(*args, **kwargs)
         if staged:
@@ -373,16 +412,17 @@ class _ScanGit(argparse.Action):
             # no changes exist, exit early
             parser.exit()
 
-        eclass_re = re.compile(r"^eclass/(?P<eclass>\S+)\.eclass$")
         eclasses, profiles, pkgs = OrderedSet(), OrderedSet(), OrderedSet()
+        categories = namespace.target_repo.categories
 
         for path in p.stdout.strip("\x00").split("\x00"):
-            path_components = path.split(os.sep)
-            if mo := eclass_re.match(path):
+            # only the leading category/package components are used
+            path_components = path.split(os.sep, 2)
+            if mo := self._eclass_re.match(path):
                 eclasses.add(mo.group("eclass"))
             elif path_components[0] == "profiles":
                 profiles.add(path)
-            elif path_components[0] in namespace.target_repo.categories:
+            elif path_components[0] in categories:
                 try:
                     pkgs.add(atom_cls(os.sep.join(path_components[:2])))
                 except MalformedAtom:
@@ -494,6 +534,8 @@ class GitAddon(caches.CachedAddon):
 
         # mapping of repo locations to their corresponding git repo caches
         self._cached_repos = {}
+        # mapping of queried paths to their .gitignore matches
+        self._gitignored_cache = {}
 
     @jit_attr
     def _gitignore(self):
@@ -511,19 +553,27 @@ class GitAddon(caches.CachedAddon):
 
     def gitignored(self, path):
         """Determine if a given path in a repository is matched by .gitignore settings."""
+        # multiple checks query the same paths so reuse prior matches
+        try:
+            return self._gitignored_cache[path]
+        except KeyError:
+            pass
+        ignored = False
         if self._gitignore is not None:
+            rel_path = path
             if path.startswith(self.options.target_repo.location):
                 repo_prefix_len = len(self.options.target_repo.location) + 1
-                path = path[repo_prefix_len:]
-            return self._gitignore.match_file(path)
-        return False
+                rel_path = path[repo_prefix_len:]
+            ignored = self._gitignore.match_file(rel_path)
+        self._gitignored_cache[path] = ignored
+        return ignored
 
     @staticmethod
-    def _get_commit_hash(path, commit):
-        """Retrieve a git repo's commit hash for a specific commit object."""
+    def _get_commit_hashes(path, *commits):
+        """Retrieve a git repo's commit hashes for commit objects using a single git call."""
         try:
             p = subprocess.run(
-                ["git", "rev-parse", commit],
+                ["git", "rev-parse", *commits],
                 stdout=subprocess.PIPE,
                 stderr=subprocess.DEVNULL,
                 cwd=path,
@@ -532,7 +582,12 @@ class GitAddon(caches.CachedAddon):
             )
         except subprocess.CalledProcessError:
             raise GitError(f"failed retrieving commit hash for git repo: {path!r}")
-        return p.stdout.strip()
+        return tuple(p.stdout.split())
+
+    @classmethod
+    def _get_commit_hash(cls, path, commit):
+        """Retrieve a git repo's commit hash for a specific commit object."""
+        return cls._get_commit_hashes(path, commit)[0]
 
     @staticmethod
     def _get_current_branch(path, commit="HEAD"):
@@ -655,8 +710,7 @@ class GitAddon(caches.CachedAddon):
         data = {}
 
         try:
-            origin = self._get_commit_hash(target_repo.location, "origin/HEAD")
-            head = self._get_commit_hash(target_repo.location, "HEAD")
+            origin, head = self._get_commit_hashes(target_repo.location, "origin/HEAD", "HEAD")
             if origin != head:
                 data = self.pkg_history(target_repo, "origin/HEAD..HEAD", local=True)
         except GitError as e:
@@ -670,8 +724,7 @@ class GitAddon(caches.CachedAddon):
         commits = ()
 
         try:
-            origin = self._get_commit_hash(target_repo.location, "origin/HEAD")
-            head = self._get_commit_hash(target_repo.location, "HEAD")
+            origin, head = self._get_commit_hashes(target_repo.location, "origin/HEAD", "HEAD")
             if origin != head:
                 commits = GitRepoCommits(target_repo.location, "origin/HEAD..HEAD")
         except GitError as e:
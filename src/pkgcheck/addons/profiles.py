@@ -1,25 +1,149 @@
 """Profile specific support and addon."""
 
+import json
 import os
 import stat
 from collections import defaultdict
-from functools import partial
+from functools import lru_cache, partial
 from itertools import chain
 
 from pkgcore.ebuild import domain, misc
 from pkgcore.ebuild import profiles as profiles_mod
+from pkgcore.ebuild.atom import atom
+from pkgcore.ebuild.cpv import VersionedCPV
+from pkgcore.ebuild.repository import ProvidesRepo
 from pkgcore.restrictions import packages, values
 from snakeoil.cli import arghparse
+from snakeoil.compatibility import IGNORED_EXCEPTIONS
 from snakeoil.containers import ProtectedSet
-from snakeoil.decorators import coroutine
-from snakeoil.klass import jit_attr
 from snakeoil.mappings import ImmutableDict
 from snakeoil.osutils import pjoin
 
 from .. import base
 from ..base import PkgcheckUserException
+from ..log import logger
 from . import ArchesAddon, caches
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _json_dumps(obj):
+    """Serialize an object to JSON encoded bytes, preferring orjson if available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _json_loads(data):
+    """Deserialize JSON encoded bytes, preferring orjson if available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _encode_chunk_key(key):
+    """Convert a chunked data restriction key into JSON serializable data tagged by type."""
+    if key == packages.AlwaysTrue:
+        return None
+    if isinstance(key, atom):
+        return ["atom", str(key)]
+    raise TypeError(f"unsupported chunked data key: {key!r}")
+
+
+def _decode_chunk_key(key):
+    """Recreate a chunked data restriction key from its serialized form."""
+    if key is None:
+        return packages.AlwaysTrue
+    kind, value = key
+    if kind == "atom":
+        return atom(value)
+    raise ValueError(f"unknown chunked data key type: {kind!r}")
+
+
+def _encode_chunked_data(data):
+    """Convert a frozen ChunkedDataDict into JSON serializable data."""
+
+    def encode(chunks):
+        return [[_encode_chunk_key(x.key), list(x.neg), list(x.pos)] for x in chunks]
+
+    mapping = data.render_to_dict()
+    global_settings = mapping.pop(packages.AlwaysTrue, ())
+    return [encode(global_settings), {k: encode(v) for k, v in mapping.items()}]
+
+
+def _decode_chunked_data(data):
+    """Recreate a frozen ChunkedDataDict from its serialized form.
+
+    Replaying the chunks through the public API reorders and collapses
+    global settings so the internal layout is restored directly, see
+    TestProfileAddon.test_cache_chunked_data_layout.
+    """
+
+    def decode(chunks):
+        return tuple(
+            misc.chunked_data(_decode_chunk_key(key), tuple(neg), tuple(pos))
+            for key, neg, pos in chunks
+        )
+
+    global_settings, mapping = data
+    obj = misc.ChunkedDataDict()
+    obj._global_settings = decode(global_settings)
+    obj._dict = ImmutableDict((k, decode(v)) for k, v in mapping.items())
+    return obj
+
+
+@lru_cache(maxsize=4096)
+def _keyword_query_list(keywords):
+    """Return the profile keys to query for a given package keywords tuple.
+
+    Stable keywords also trigger their unstable counterparts.
+    """
+    return keywords + tuple("~" + x for x in keywords if not x.startswith("~"))
+
+
+def _chunked_data_key(data):
+    """Return a hashable key matching equality for a frozen ChunkedDataDict."""
+    return frozenset(data.render_to_dict().items())
+
+
+def _encode_profile_entry(d):
+    """Convert a cached profile entry into JSON serializable data."""
+    mtime, files = d["files"]
+    return {
+        "files": [mtime, sorted(files)],
+        "masks": sorted(map(str, d["masks"])),
+        "unmasks": sorted(map(str, d["unmasks"])),
+        "immutable_flags": _encode_chunked_data(d["immutable_flags"]),
+        "stable_immutable_flags": _encode_chunked_data(d["stable_immutable_flags"]),
+        "enabled_flags": _encode_chunked_data(d["enabled_flags"]),
+        "stable_enabled_flags": _encode_chunked_data(d["stable_enabled_flags"]),
+        "pkg_use": _encode_chunked_data(d["pkg_use"]),
+        "iuse_effective": sorted(d["iuse_effective"]),
+        "use": sorted(d["use"]),
+        "provides_repo": sorted(pkg.cpvstr for pkg in d["provides_repo"]),
+    }
+
+
+def _decode_profile_entry(d, arches):
+    """Recreate a cached profile entry from its serialized form."""
+    mtime, files = d["files"]
+    return {
+        "files": (mtime, frozenset(files)),
+        "masks": frozenset(map(atom, d["masks"])),
+        "unmasks": frozenset(map(atom, d["unmasks"])),
+        "immutable_flags": _decode_chunked_data(d["immutable_flags"]),
+        "stable_immutable_flags": _decode_chunked_data(d["stable_immutable_flags"]),
+        "enabled_flags": _decode_chunked_data(d["enabled_flags"]),
+        "stable_enabled_flags": _decode_chunked_data(d["stable_enabled_flags"]),
+        "pkg_use": _decode_chunked_data(d["pkg_use"]),
+        "iuse_effective": frozenset(d["iuse_effective"]),
+        "use": frozenset(d["use"]),
+        "provides_repo": ProvidesRepo(map(VersionedCPV, d["provides_repo"]), arches),
+    }
+
 
 class ProfileData:
     def __init__(
@@ -51,6 +175,7 @@ class ProfileData:
         self.forced_use = forced_use
         self.cache = lookup_cache
         self.insoluble = insoluble
+        self.vfilter = vfilter
         self.visible = vfilter.match
         self.status = status
         self.deprecated = deprecated
@@ -59,10 +184,11 @@ class ProfileData:
         # note we're trying to be *really* careful about not creating
         # pointless intermediate sets unless required
         # kindly don't change that in any modifications, it adds up.
+        masked = self.masked_use.pull_data(pkg)
         enabled = known_flags.intersection(self.forced_use.pull_data(pkg))
-        immutable = enabled.union(filter(known_flags.__contains__, self.masked_use.pull_data(pkg)))
-        if force_disabled := self.masked_use.pull_data(pkg):
-            enabled = enabled.difference(force_disabled)
+        immutable = enabled.union(filter(known_flags.__contains__, masked))
+        if masked:
+            enabled = enabled.difference(masked)
         return immutable, enabled
 
 
@@ -77,14 +203,13 @@ class ProfilesArgs(arghparse.CommaSeparatedNegations):
     def norm_name(repo, s):
         """Expand status keywords and format paths."""
         if s in ("dev", "exp", "stable", "deprecated"):
-            yield from repo.profiles.get_profiles(status=s)
+            return tuple(repo.profiles.get_profiles(status=s))
         elif s == "all":
-            yield from repo.profiles
-        else:
-            try:
-                yield repo.profiles[os.path.normpath(s)]
-            except KeyError:
-                raise ValueError(f"nonexistent profile: {s!r}")
+            return tuple(repo.profiles)
+        try:
+            return (repo.profiles[os.path.normpath(s)],)
+        except KeyError:
+            raise ValueError(f"nonexistent profile: {s!r}")
 
     def __call__(self, parser, namespace, values, option_string=None):
         disabled, enabled = self.parse_values(values)
@@ -93,11 +218,15 @@ class ProfilesArgs(arghparse.CommaSeparatedNegations):
         # Expand status keywords, e.g. 'stable' -> set of stable profiles, and
         # translate selections into profile objs.
         norm_name = partial(self.norm_name, namespace.target_repo)
+        disabled_profiles, enabled_profiles = set(), set()
         try:
-            disabled = set().union(*map(norm_name, disabled))
-            enabled = set().union(*map(norm_name, enabled))
+            for s in disabled:
+                disabled_profiles.update(norm_name(s))
+            for s in enabled:
+                enabled_profiles.update(norm_name(s))
         except ValueError as e:
             parser.error(str(e))
+        disabled, enabled = disabled_profiles, enabled_profiles
 
         # If no profiles are enabled, then all that are defined in
         # profiles.desc are scanned except ones that are explicitly disabled.
@@ -119,7 +248,7 @@ class ProfileAddon(caches.CachedAddon):
     non_profile_dirs = frozenset(["desc", "updates"])
 
     # cache registry
-    cache = caches.CacheData(type="profiles", file="profiles.pickle", version=2)
+    cache = caches.CacheData(type="profiles", file="profiles.json", version=4)
 
     @classmethod
     def mangle_argparser(cls, parser):
@@ -158,6 +287,29 @@ class ProfileAddon(caches.CachedAddon):
         )
         parser.bind_delayed_default(1001, "profiles")(cls._default_profiles)
 
+    def _load(self, f):
+        """Deserialize JSON profiles cache data."""
+        data = _json_loads(f.read())
+        cache = caches.CacheData(self.cache.type, self.cache.file, data["version"])
+        profiles = {}
+        # skip decoding outdated entries, they're dropped during cache loading
+        if cache.version == self.cache.version:
+            arches = self.target_repo.known_arches
+            for path, entry in data["profiles"].items():
+                try:
+                    profiles[path] = _decode_profile_entry(entry, arches)
+                except IGNORED_EXCEPTIONS:
+                    raise
+                except Exception as e:
+                    # drop the entry so only its profile gets regenerated
+                    logger.debug("dropping profiles cache entry %r: %s", path, e)
+        return caches.DictCache(profiles, cache)
+
+    def _dump(self, data, f):
+        """Serialize profiles cache data to JSON."""
+        profiles = {path: _encode_profile_entry(entry) for path, entry in data.items()}
+        f.write(_json_dumps({"version": data.version, "profiles": profiles}))
+
     @staticmethod
     def _default_profiles(namespace, attr):
         """Determine set of profiles to enable by default."""
@@ -179,6 +331,8 @@ class ProfileAddon(caches.CachedAddon):
         self.arch_profiles = defaultdict(list)
         self.target_repo = self.options.target_repo
         ignore_deprecated = getattr(self.options, "ignore_deprecated_profiles", True)
+        profile_data = {}
+        node_cache = {}
 
         for p in sorted(self.options.profiles):
             if p.deprecated and ignore_deprecated:
@@ -192,46 +346,47 @@ class ProfileAddon(caches.CachedAddon):
                     raise PkgcheckUserException(f"invalid profile: {e.path!r}: {e.error}")
                 continue
             self.arch_profiles[p.arch].append((profile, p))
+            profile_data[p] = self._scan_profile_files(profile, node_cache)
 
-    @coroutine
-    def _profile_files(self):
+        # mapping of profile age and file sets used to check cache viability
+        self.profile_data = ImmutableDict(profile_data)
+
+    @staticmethod
+    def _scan_profile_files(profile, node_cache):
         """Given a profile object, return its file set and most recent mtime."""
-        cache = {}
-        while True:
-            profile = yield
-            profile_mtime = 0
-            profile_files = []
-            for node in profile.stack:
-                mtime, files = cache.get(node.path, (0, []))
-                if not mtime:
-                    for f in os.listdir(node.path):
-                        p = pjoin(node.path, f)
-                        st_obj = os.lstat(p)
+        profile_mtime = 0
+        profile_files = []
+        for node in profile.stack:
+            mtime, files = node_cache.get(node.path, (0, []))
+            if not mtime:
+                with os.scandir(node.path) as it:
+                    for entry in it:
+                        st_obj = entry.stat(follow_symlinks=False)
                         if stat.S_ISREG(st_obj.st_mode):
-                            files.append(p)
+                            files.append(entry.path)
                             if st_obj.st_mtime > mtime:
                                 mtime = st_obj.st_mtime
-                    cache[node.path] = (mtime, files)
-                if mtime > profile_mtime:
-                    profile_mtime = mtime
-                profile_files.extend(files)
-            yield profile_mtime, frozenset(profile_files)
-
-    @jit_attr
-    def profile_data(self):
-        """Mapping of profile age and file sets used to check cache viability."""
-        data = {}
-        gen_profile_data = self._profile_files()
-        for profile_obj, profile in chain.from_iterable(self.arch_profiles.values()):
-            mtime, files = gen_profile_data.send(profile_obj)
-            data[profile] = (mtime, files)
-            next(gen_profile_data)
-        return ImmutableDict(data)
+                node_cache[node.path] = (mtime, files)
+            if mtime > profile_mtime:
+                profile_mtime = mtime
+            profile_files.extend(files)
+        return profile_mtime, frozenset(profile_files)
 
     def update_cache(self, force=False):
         """Update related cache and push updates to disk."""
         cached_profiles = defaultdict(dict)
         official_arches = self.target_repo.known_arches
+        arches = sorted(self.options.arches)
+        # USE flags for all other arches are masked on a given arch's profiles
+        default_masked_use = {
+            arch: tuple(x for x in official_arches if x != arch) for arch in arches
+        }
+        # padding for progress output
+        padding = max(map(len, arches), default=0)
+        # keyword restrictions and visibility filters shared across profiles
+        keyword_restricts = {}
+        vfilters = {}
+        keyword_vfilters = {}
 
         with base.ProgressManager(verbosity=self.options.verbosity) as progress:
             for repo in self.target_repo.trees:
@@ -244,25 +399,24 @@ class ProfileAddon(caches.CachedAddon):
 
                 chunked_data_cache = {}
 
-                for arch in sorted(self.options.arches):
+                for arch in arches:
                     stable_key, unstable_key = arch, f"~{arch}"
-                    stable_r = packages.PackageRestriction(
-                        "keywords", values.ContainmentMatch2((stable_key,))
-                    )
-                    unstable_r = packages.PackageRestriction(
-                        "keywords",
-                        values.ContainmentMatch2(
-                            (
-                                stable_key,
-                                unstable_key,
-                            )
-                        ),
-                    )
-
-                    default_masked_use = tuple(set(x for x in official_arches if x != stable_key))
-
-                    # padding for progress output
-                    padding = max(len(x) for x in self.options.arches)
+                    try:
+                        stable_r, unstable_r = keyword_restricts[arch]
+                    except KeyError:
+                        stable_r = packages.PackageRestriction(
+                            "keywords", values.ContainmentMatch2((stable_key,))
+                        )
+                        unstable_r = packages.PackageRestriction(
+                            "keywords",
+                            values.ContainmentMatch2(
+                                (
+                                    stable_key,
+                                    unstable_key,
+                                )
+                            ),
+                        )
+                        keyword_restricts[arch] = (stable_r, unstable_r)
 
                     for profile_obj, profile in self.arch_profiles.get(arch, []):
                         files = self.profile_data.get(profile)
@@ -294,14 +448,14 @@ class ProfileAddon(caches.CachedAddon):
                                 unmasks = profile_obj.unmasks
 
                                 immutable_flags = profile_obj.masked_use.clone(unfreeze=True)
-                                immutable_flags.add_bare_global((), default_masked_use)
+                                immutable_flags.add_bare_global((), default_masked_use[arch])
                                 immutable_flags.optimize(cache=chunked_data_cache)
                                 immutable_flags.freeze()
 
                                 stable_immutable_flags = profile_obj.stable_masked_use.clone(
                                     unfreeze=True
                                 )
-                                stable_immutable_flags.add_bare_global((), default_masked_use)
+                                stable_immutable_flags.add_bare_global((), default_masked_use[arch])
                                 stable_immutable_flags.optimize(cache=chunked_data_cache)
                                 stable_immutable_flags.freeze()
 
@@ -358,16 +512,30 @@ class ProfileAddon(caches.CachedAddon):
                         # note that the cache/insoluble are inversly paired;
                         # stable cache is usable for unstable, but not vice versa.
                         # unstable insoluble is usable for stable, but not vice versa
-                        vfilter = domain.generate_filter(
-                            self.target_repo.pkg_masks | masks, unmasks
-                        )
+                        try:
+                            stable_vfilter, unstable_vfilter = keyword_vfilters[
+                                arch, masks, unmasks
+                            ]
+                        except KeyError:
+                            try:
+                                vfilter = vfilters[masks, unmasks]
+                            except KeyError:
+                                vfilter = vfilters[masks, unmasks] = domain.generate_filter(
+                                    self.target_repo.pkg_masks | masks, unmasks
+                                )
+                            stable_vfilter = packages.AndRestriction(vfilter, stable_r)
+                            unstable_vfilter = packages.AndRestriction(vfilter, unstable_r)
+                            keyword_vfilters[arch, masks, unmasks] = (
+                                stable_vfilter,
+                                unstable_vfilter,
+                            )
                         self.profile_filters.setdefault(stable_key, []).append(
                             ProfileData(
                                 repo.repo_id,
                                 profile.path,
                                 stable_key,
                                 provides_repo,
-                                packages.AndRestriction(vfilter, stable_r),
+                                stable_vfilter,
                                 iuse_effective,
                                 use,
                                 pkg_use,
@@ -386,7 +554,7 @@ class ProfileAddon(caches.CachedAddon):
                                 profile.path,
                                 unstable_key,
                                 provides_repo,
-                                packages.AndRestriction(vfilter, unstable_r),
+                                unstable_vfilter,
                                 iuse_effective,
                                 use,
                                 pkg_use,
@@ -406,30 +574,39 @@ class ProfileAddon(caches.CachedAddon):
                 cache_file = self.cache_file(repo)
                 cache = caches.DictCache(cached_profiles[repo.config.profiles_base], self.cache)
                 self.save_cache(cache, cache_file)
+                # drop the pickled cache file used by earlier releases
+                try:
+                    os.remove(pjoin(os.path.dirname(cache_file), "profiles.pickle"))
+                except FileNotFoundError:
+                    pass
 
         for key, profile_list in self.profile_filters.items():
-            similar = self.profile_evaluate_dict[key] = []
+            similar = {}
             for profile in profile_list:
-                for existing in similar:
-                    if (
-                        existing[0].masked_use == profile.masked_use
-                        and existing[0].forced_use == profile.forced_use
-                    ):
-                        existing.append(profile)
-                        break
-                else:
-                    similar.append([profile])
+                use_key = (
+                    _chunked_data_key(profile.masked_use),
+                    _chunked_data_key(profile.forced_use),
+                )
+                # profiles sharing a visibility filter only need to check it once
+                similar.setdefault(use_key, {}).setdefault(id(profile.vfilter), []).append(profile)
+            self.profile_evaluate_dict[key] = [
+                [(profiles[0].visible, profiles) for profiles in vfilter_grps.values()]
+                for vfilter_grps in similar.values()
+            ]
 
     def identify_profiles(self, pkg):
         # yields groups of profiles; the 'groups' are grouped by the ability to share
         # the use processing across each of 'em.
         groups = []
-        keywords = pkg.keywords
-        unstable_keywords = (f"~{x}" for x in keywords if x[0] != "~")
-        for key in chain(keywords, unstable_keywords):
-            if profile_grps := self.profile_evaluate_dict.get(key):
-                for profiles in profile_grps:
-                    if group := [x for x in profiles if x.visible(pkg)]:
+        profile_evaluate = self.profile_evaluate_dict.get
+        for key in _keyword_query_list(tuple(pkg.keywords)):
+            if profile_grps := profile_evaluate(key):
+                for vfilter_grps in profile_grps:
+                    group = []
+                    for visible, profiles in vfilter_grps:
+                        if visible(pkg):
+                            group.extend(profiles)
+                    if group:
                         groups.append(group)
         return groups
 
@@ -453,4 +630,4 @@ class ProfileAddon(caches.CachedAddon):
         return chain.from_iterable(self.profile_filters.values())
 
     def __len__(self):
-        return len([x for x in self])
+        return sum(map(len, self.profile_filters.values()))
@@ -15,7 +15,7 @@ import sys
 import typing
 from contextlib import AbstractContextManager, ExitStack, contextmanager
 from dataclasses import dataclass
-from functools import partial
+from functools import lru_cache, partial
 from itertools import chain
 
 from snakeoil.cli.exceptions import UserException
@@ -145,6 +145,16 @@ class Addon:
     """
 
     required_addons = ()
+    # required addons across the inheritance tree, set for subclasses
+    _all_required_addons = ()
+
+    def __init_subclass__(cls, **kwargs):
+        """Collect the required addons for a subclass' inheritance tree."""
+        super().__init_subclass__(**kwargs)
+        required_addons = chain.from_iterable(
+            x.__dict__.get("required_addons", ()) for x in cls.__mro__ if issubclass(x, Addon)
+        )
+        cls._all_required_addons = tuple(dict.fromkeys(required_addons))
 
     def __init__(self, options, **kwargs):
         """Initialize.
@@ -159,8 +169,10 @@ class Addon:
     def mangle_argparser(parser):
         """Add extra options and/or groups to the argparser.
 
-        This hook is always triggered, even if the checker is not
-        activated (because it runs before the commandline is parsed).
+        This hook is triggered once from the pre-parse stage of the
+        subcommands using addons (e.g. ``pkgcheck scan``), even if the checker
+        is not activated (because it runs before the commandline is parsed).
+        Other subcommands and top-level help output never run it.
 
         :param parser: an C{argparse.ArgumentParser} instance.
         """
@@ -182,6 +194,7 @@ def get_addons(objects):
     return tuple(addons)
 
 
+@lru_cache(maxsize=None)
 def param_name(cls):
     """Restructure class names for injected parameters.
 
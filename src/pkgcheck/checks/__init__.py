@@ -4,7 +4,6 @@ from collections import defaultdict
 from functools import total_ordering
 
 from pkgcore import fetch
-from snakeoil import klass
 from snakeoil.strings import pluralism
 
 from .. import addons, base, feeds, runners, sources
@@ -25,14 +24,22 @@ class Check(feeds.Feed):
     known_results = frozenset()
     # checkrunner class used to execute this check
     runner_cls = runners.SyncCheckRunner
-
-    @klass.jit_attr
-    def priority(self):
-        """Priority that affects order in which checks are run."""
-        # raise priority for checks that scan for metadata errors
-        if self.known_results.intersection(MetadataError.results.values()):
-            return -1
-        return 0
+    # priority that affects order in which checks are run
+    priority = 0
+    # explicitly set priority inherited by subclasses
+    _priority = None
+
+    def __init_subclass__(cls, **kwargs):
+        """Determine check priority if not explicitly set."""
+        super().__init_subclass__(**kwargs)
+        if "priority" in cls.__dict__:
+            cls._priority = cls.priority
+        elif cls._priority is None:
+            # raise priority for checks that scan for metadata errors
+            if cls.known_results.intersection(MetadataError.results.values()):
+                cls.priority = -1
+            else:
+                cls.priority = 0
 
     @property
     def source(self):
@@ -52,10 +59,13 @@ class Check(feeds.Feed):
                 )
         return self._source
 
+    @property
+    def sort_key(self):
+        """Key used to sort checks into their running order."""
+        return self.priority, self.__class__.__name__
+
     def __lt__(self, other):
-        if self.priority == other.priority:
-            return self.__class__.__name__ < other.__class__.__name__
-        return self.priority < other.priority
+        return self.sort_key < other.sort_key
 
 
 class RepoCheck(Check):
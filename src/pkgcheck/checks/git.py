@@ -2,6 +2,7 @@
 
 import os
 import re
+import string
 import subprocess
 import tarfile
 from collections import defaultdict
@@ -15,7 +16,6 @@ from pkgcore.ebuild.misc import sort_keywords
 from pkgcore.ebuild.repository import UnconfiguredTree
 from pkgcore.fetch import fetchable
 from snakeoil import klass
-from snakeoil.mappings import ImmutableDict
 from snakeoil.osutils import pjoin
 from snakeoil.sequences import iflatten_instance
 from snakeoil.strings import pluralism
@@ -645,7 +645,7 @@ class GitCommitMessageCheck(GentooRepoCheck, GitCommitsCheck):
 
     # mapping between known commit tags and verification methods
     known_tags = {}
-    _commit_footer_regex = re.compile(r"^(?P<tag>[a-zA-Z0-9_-]+): (?P<value>.*)$")
+    _commit_footer_tag_chars = frozenset(string.ascii_letters + string.digits + "_-")
     _git_cat_file_regex = re.compile(r"^(?P<object>.+?) (?P<status>.+)$")
     _commit_ref_regex = re.compile(r"^(?P<object>[0-9a-fA-F]+?)( \(.+?\))?\.?$")
 
@@ -660,16 +660,17 @@ class GitCommitMessageCheck(GentooRepoCheck, GitCommitsCheck):
 
     def __init__(self, *args):
         super().__init__(*args)
-        # mapping of required tags to forcibly run verifications methods
-        self._required_tags = ImmutableDict(
-            ((tag, verify), []) for tag, (verify, required) in self.known_tags.items() if required
+        # required tags to forcibly run verifications methods
+        self._required_tags = tuple(
+            (tag, verify) for tag, (verify, required) in self.known_tags.items() if required
         )
 
     @verify_tags("Signed-off-by", required=True)
     def _signed_off_by_tag(self, tag: str, values: list[str], commit: git.GitCommit):
         """Verify commit contains all required sign offs in accordance with GLEP 76."""
-        required_sign_offs = {commit.author, commit.committer}
-        if missing_sign_offs := required_sign_offs.difference(values):
+        author, committer = commit.author, commit.committer
+        required_sign_offs = (author,) if author == committer else (author, committer)
+        if missing_sign_offs := [x for x in required_sign_offs if x not in values]:
             yield MissingSignOff(sorted(missing_sign_offs), commit=commit)
 
     @verify_tags("Gentoo-Bug")
@@ -704,6 +705,28 @@ class GitCommitMessageCheck(GentooRepoCheck, GitCommitsCheck):
             bufsize=1,
         )
 
+    def _parse_footer(self, line: str):
+        """Split a footer line into its tag and value, returning None for non-tags."""
+        tag, sep, value = line.partition(": ")
+        if sep and tag and self._commit_footer_tag_chars.issuperset(tag):
+            return tag, value
+        return None
+
+    def _register_tag(self, tags: dict, tag: str, value: str):
+        """Register a footer tag value for verification if the tag is known."""
+        try:
+            func, _required = self.known_tags[tag]
+        except KeyError:
+            return
+        tags.setdefault((tag, func), []).append(value)
+
+    def cleanup(self):
+        # shut down the `git cat-file` process if one was started
+        if (git_cat_file := getattr(self, "_git_cat_file", None)) is not None:
+            git_cat_file.stdin.close()
+            git_cat_file.wait()
+            self._git_cat_file = None
+
     @verify_tags("Fixes", "Reverts")
     def _commit_tag(self, tag, values, commit: git.GitCommit):
         """Verify referenced commits exist for Fixes/Reverts tags."""
@@ -713,6 +736,9 @@ class GitCommitMessageCheck(GentooRepoCheck, GitCommitsCheck):
                 commits[mo.group("object")] = value
             else:
                 yield InvalidCommitTag(tag, value, "invalid format", commit=commit)
+        if not commits:
+            # avoid queries that would desync the shared process output
+            return
         self.git_cat_file.stdin.write("\n".join(commits.keys()) + "\n")
         if self.git_cat_file.poll() is None:
             for _ in range(len(commits)):
@@ -725,6 +751,46 @@ class GitCommitMessageCheck(GentooRepoCheck, GitCommitsCheck):
                             tag, commits[value], f"{status} commit", commit=commit
                         )
 
+    def _verify_body_and_footer(self, commit: git.GitCommit, tags: dict):
+        """Verify commit message body and footer formatting, registering found tags."""
+        # verify message body
+        i = iter(commit.message[1:])
+        lineno = 1
+        body = False
+        for lineno, line in enumerate(i, lineno):
+            if not line.strip():
+                continue
+            if self._parse_footer(line) is None:
+                if not body and commit.message[1] != "":
+                    yield InvalidCommitMessage("missing empty line before body", commit=commit)
+                # still processing the body
+                body = True
+                if len(line.split()) > 1 and len(line) > 80:
+                    yield InvalidCommitMessage(
+                        f"line {lineno} greater than 80 chars: {line!r}", commit=commit
+                    )
+            else:
+                if commit.message[lineno - 1] != "":
+                    yield InvalidCommitMessage("missing empty line before tags", commit=commit)
+                # push it back on the stack
+                i = chain([line], i)
+                break
+
+        # verify footer
+        for lineno, line in enumerate(i, lineno + 1):
+            if not line.strip():
+                # single empty end line is ignored
+                if lineno != len(commit.message):
+                    yield InvalidCommitMessage(f"empty line {lineno} in footer", commit=commit)
+                continue
+            if footer := self._parse_footer(line):
+                # register known tags for verification
+                self._register_tag(tags, *footer)
+            else:
+                yield InvalidCommitMessage(
+                    f"non-tag in footer, line {lineno}: {line!r}", commit=commit
+                )
+
     def feed(self, commit: git.GitCommit):
         if len(commit.message) == 0:
             yield InvalidCommitMessage("no commit message", commit=commit)
@@ -746,7 +812,7 @@ class GitCommitMessageCheck(GentooRepoCheck, GitCommitsCheck):
             if len({x.package for x in atoms}) == 1:
                 # changes to a single cat/pn
                 atom = next(iter(atoms))
-                if not re.match(rf"^{re.escape(atom.key)}: ", summary):
+                if not summary.startswith(f"{atom.key}: "):
                     error = f"summary missing {atom.key!r} package prefix"
                     yield BadCommitSummary(error, summary, commit=commit)
                 # check for version in summary for singular, non-revision bumps
@@ -759,55 +825,19 @@ class GitCommitMessageCheck(GentooRepoCheck, GitCommitsCheck):
                         yield BadCommitSummary(error, summary, commit=commit)
             else:
                 # mutiple pkg changes in the same category
-                if not re.match(rf"^{re.escape(category)}: ", summary):
+                if not summary.startswith(f"{category}: "):
                     error = f"summary missing {category!r} category prefix"
                     yield BadCommitSummary(error, summary, commit=commit)
 
-        # verify message body
-        i = iter(commit.message[1:])
-        lineno = 1
-        body = False
-        for lineno, line in enumerate(i, lineno):
-            if not line.strip():
-                continue
-            if self._commit_footer_regex.match(line) is None:
-                if not body and commit.message[1] != "":
-                    yield InvalidCommitMessage("missing empty line before body", commit=commit)
-                # still processing the body
-                body = True
-                if len(line.split()) > 1 and len(line) > 80:
-                    yield InvalidCommitMessage(
-                        f"line {lineno} greater than 80 chars: {line!r}", commit=commit
-                    )
-            else:
-                if commit.message[lineno - 1] != "":
-                    yield InvalidCommitMessage("missing empty line before tags", commit=commit)
-                # push it back on the stack
-                i = chain([line], i)
-                break
-
         # mapping of defined tags to any existing verification methods
-        tags = dict(self._required_tags)
+        tags = {key: [] for key in self._required_tags}
 
-        # verify footer
-        for lineno, line in enumerate(i, lineno + 1):
-            if not line.strip():
-                # single empty end line is ignored
-                if lineno != len(commit.message):
-                    yield InvalidCommitMessage(f"empty line {lineno} in footer", commit=commit)
-                continue
-            if mo := self._commit_footer_regex.match(line):
-                # register known tags for verification
-                tag = mo.group("tag")
-                try:
-                    func, required = self.known_tags[tag]
-                    tags.setdefault((tag, func), []).append(mo.group("value"))
-                except KeyError:
-                    continue
-            else:
-                yield InvalidCommitMessage(
-                    f"non-tag in footer, line {lineno}: {line!r}", commit=commit
-                )
+        message = commit.message
+        if len(message) == 3 and not message[1] and (footer := self._parse_footer(message[2])):
+            # fast path for the common summary and single tag (usually sign-off) layout
+            self._register_tag(tags, *footer)
+        else:
+            yield from self._verify_body_and_footer(commit, tags)
 
         # run tag verification methods
         for (tag, func), values in tags.items():
@@ -115,14 +115,16 @@ class _HeaderCheck(GentooRepoCheck):
     def feed(self, item):
         if item.lines:
             line = item.lines[0].strip()
-            if mo := copyright_regex.match(line):
+            # skip the regex for lines that can't possibly match
+            if line.startswith("# Copyright ") and (mo := copyright_regex.match(line)):
                 # Copyright policy is active since 2018-10-21, so it applies
                 # to all ebuilds committed in 2019 and later
                 if int(mo.group("end")) >= 2019:
-                    if mo.group("holder") == "Gentoo Foundation":
+                    holder = mo.group("holder")
+                    if holder == "Gentoo Foundation":
                         yield self._old_copyright(line, **self.args(item))
                     # Gentoo policy requires 'Gentoo Authors'
-                    elif mo.group("holder") != "Gentoo Authors":
+                    elif holder != "Gentoo Authors":
                         yield self._non_gentoo_authors(line, **self.args(item))
             else:
                 yield self._invalid_copyright(line, **self.args(item))
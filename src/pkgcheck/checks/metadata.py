@@ -1212,7 +1212,7 @@ class KeywordsCheck(Check):
                 if dep_keywords:
                     dep_keywords = set.intersection(*dep_keywords.values())
                     pkg_keywords = set(pkg.keywords)
-                    pkg_keywords.update(f"~{x}" for x in pkg.keywords if x[0] != "~")
+                    pkg_keywords.update("~" + x for x in pkg.keywords if not x.startswith("~"))
                     if keywords := dep_keywords - pkg_keywords:
                         yield VirtualKeywordsUpdate(sort_keywords(keywords), pkg=pkg)
 
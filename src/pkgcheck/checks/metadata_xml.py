@@ -8,6 +8,7 @@ from pkgcore import const as pkgcore_const
 from pkgcore.ebuild.atom import MalformedAtom, atom
 from pkgcore.restrictions.packages import Conditional
 from pkgcore.fetch import fetchable
+from snakeoil import klass
 from snakeoil.osutils import pjoin
 from snakeoil.sequences import iflatten_instance
 from snakeoil.strings import pluralism
@@ -307,6 +308,20 @@ class InvalidMetadataRestrict(results.PackageResult, results.Error):
         return f"metadata.xml: invalid package restrictions {self.restrict!r}: {self.msg}"
 
 
+# compiled XML schemas keyed by xsd file path and modification time
+_schema_cache = {}
+
+
+def _load_schema(path):
+    """Return a compiled XML schema for a given xsd file, reusing prior loads."""
+    key = (path, os.stat(path).st_mtime_ns)
+    try:
+        return _schema_cache[key]
+    except KeyError:
+        schema = _schema_cache[key] = etree.XMLSchema(etree.parse(path))
+        return schema
+
+
 class _XmlBaseCheck(Check):
     """Base class for metadata.xml scans."""
 
@@ -316,12 +331,22 @@ class _XmlBaseCheck(Check):
     invalid_error = None
     missing_error = None
 
+    # leading whitespace of lines with content
+    _indent_re = re.compile(rb"^[^\S\n]+(?=\S)", re.MULTILINE)
+
+    def __init_subclass__(cls, **kwargs):
+        """Determine the content validation check method names for subclasses."""
+        super().__init_subclass__(**kwargs)
+        cls._content_check_names = tuple(x for x in dir(cls) if x.startswith("_check_"))
+
     def __init__(self, *args):
         super().__init__(*args)
         self.repo_base = self.options.target_repo.location
         self.pkgref_cache = {}
+        # single parser reused for all documents
+        self._parser = etree.XMLParser(no_network=True)
         # content validation checks to run after parsing XML doc
-        self._checks = tuple(getattr(self, x) for x in dir(self) if x.startswith("_check_"))
+        self._checks = tuple(getattr(self, x) for x in self._content_check_names)
 
         # Prefer xsd file from the target repository or its masters, falling
         # back to the file installed with pkgcore.
@@ -329,60 +354,84 @@ class _XmlBaseCheck(Check):
             metadata_xsd = pjoin(repo.location, "metadata", "xml-schema", "metadata.xsd")
             if os.path.isfile(metadata_xsd):
                 try:
-                    self.schema = etree.XMLSchema(etree.parse(metadata_xsd))
+                    self.schema = _load_schema(metadata_xsd)
                     break
                 except etree.XMLSchemaParseError:
                     # ignore invalid xsd files
                     pass
         else:
             metadata_xsd = pjoin(pkgcore_const.DATA_PATH, "xml-schema", "metadata.xsd")
-            self.schema = etree.XMLSchema(etree.parse(metadata_xsd))
+            self.schema = _load_schema(metadata_xsd)
+
+    @klass.jit_attr
+    def _categories(self):
+        """Frozen set of categories from the search repo for reference checks."""
+        return frozenset(self.options.search_repo.categories)
 
-    def _check_doc(self, pkg, loc, doc):
+    def _check_doc(self, pkg, fname, data, doc):
         """Perform additional document structure checks."""
         # Find all root descendant elements that are empty except
         # 'stabilize-allarches' which is allowed to be empty and 'flag' which
-        # is caught by MissingLocalUseDesc.
+        # is caught by MissingLocalUseDesc. Category and package references
+        # are collected during the same walk.
+        cats, pkgs = [], []
         for el in doc.getroot().iterdescendants():
+            tag = el.tag
+            if tag == "cat":
+                cats.append(el)
+            elif tag == "pkg":
+                pkgs.append(el)
             if (
                 not el.getchildren()
                 and (el.text is None or not el.text.strip())
-                and el.tag not in ("flag", "stabilize-allarches")
+                and tag not in ("flag", "stabilize-allarches")
             ):
-                yield self.empty_element(os.path.basename(loc), el.tag, el.sourceline, pkg=pkg)
+                yield self.empty_element(fname, tag, el.sourceline, pkg=pkg)
 
-        for el in doc.findall(".//cat"):
+        categories = self._categories
+        for el in cats:
             c = el.text.strip()
-            if c not in self.options.search_repo.categories:
-                yield self.catref_error(os.path.basename(loc), c, pkg=pkg)
+            if c not in categories:
+                yield self.catref_error(fname, c, pkg=pkg)
 
-        for el in doc.findall(".//pkg"):
+        pkgref_cache = self.pkgref_cache
+        has_match = self.options.search_repo.has_match
+        for el in pkgs:
             p = el.text.strip()
-            if p not in self.pkgref_cache:
+            if (found := pkgref_cache.get(p)) is None:
                 try:
-                    a = atom(p)
-                    found = self.options.search_repo.has_match(a)
+                    found = has_match(atom(p))
                 except MalformedAtom:
                     found = False
-                self.pkgref_cache[p] = found
+                pkgref_cache[p] = found
 
-            if not self.pkgref_cache[p]:
-                yield self.pkgref_error(os.path.basename(loc), p, pkg=pkg)
+            if not found:
+                yield self.pkgref_error(fname, p, pkg=pkg)
 
-    def _check_whitespace(self, pkg, loc, doc):
+    def _check_whitespace(self, pkg, fname, data, doc):
         """Check for indentation consistency."""
+        # Skip scanning files where indentation can't be mixed, i.e. ones
+        # indented solely by tabs or spaces. Files containing any other
+        # whitespace that could be used for indentation are always scanned.
+        if b"\r" not in data and b"\x0b" not in data and b"\x0c" not in data:
+            if b"\t" not in data or (
+                b"\n " not in data and b"\t " not in data and not data.startswith(b" ")
+            ):
+                return
+
         orig_indent = None
         indents = set()
-        with open(loc) as f:
-            for lineno, line in enumerate(f, 1):
-                for i in line[: -len(line.lstrip())]:
-                    if i != orig_indent:
-                        if orig_indent is None:
-                            orig_indent = i
-                        else:
-                            indents.add(lineno)
+        lineno, pos = 1, 0
+        for mo in self._indent_re.finditer(data):
+            indent = mo.group()
+            if orig_indent is None:
+                orig_indent = indent[:1]
+            if indent.strip(orig_indent):
+                lineno += data.count(b"\n", pos, mo.start())
+                pos = mo.start()
+                indents.add(lineno)
         if indents:
-            yield self.indent_error(os.path.basename(loc), lines=map(str, sorted(indents)), pkg=pkg)
+            yield self.indent_error(fname, lines=map(str, sorted(indents)), pkg=pkg)
 
     @staticmethod
     def _format_lxml_errors(error_log):
@@ -390,27 +439,31 @@ class _XmlBaseCheck(Check):
             yield f"line {x.line}, col {x.column}: ({x.type_name}) {x.message}"
 
     def _parse_xml(self, pkg, loc):
+        fname = os.path.basename(loc)
         try:
-            doc = etree.parse(loc)
+            # file data is reused for checks run against the raw document
+            with open(loc, "rb") as f:
+                data = f.read()
+            doc = etree.ElementTree(etree.fromstring(data, self._parser, base_url=loc))
         except (IOError, OSError):
             # it's only an error when missing in the main gentoo repo
             if self.options.gentoo_repo:
-                yield self.missing_error(os.path.basename(loc), pkg=pkg)
+                yield self.missing_error(fname, pkg=pkg)
             return
         except etree.XMLSyntaxError as e:
-            yield self.misformed_error(os.path.basename(loc), str(e), pkg=pkg)
+            yield self.misformed_error(fname, str(e), pkg=pkg)
             return
 
         # note: while doc is available, do not pass it here as it may
         # trigger undefined behavior due to incorrect structure
         if self.schema is not None and not self.schema.validate(doc):
             message = "\n".join(self._format_lxml_errors(self.schema.error_log))
-            yield self.invalid_error(os.path.basename(loc), message, pkg=pkg)
+            yield self.invalid_error(fname, message, pkg=pkg)
             return
 
         # run all post parsing/validation checks
         for check in self._checks:
-            yield from check(pkg, loc, doc)
+            yield from check(pkg, fname, data, doc)
 
     def feed(self, pkgset):
         pkg = pkgset[0]
@@ -482,46 +535,61 @@ class PackageMetadataXmlCheck(_XmlBaseCheck):
         # a positive decimal number
         "vim": (re.compile(r"^[1-9]\d*$"), "{script_id}"),
     }
+    # bound match methods for each remote type
+    _remote_id_matchers = {
+        k: (validator.match, expected) for k, (validator, expected) in remote_id_validators.items()
+    }
 
-    @staticmethod
-    def _maintainer_proxied_key(m):
-        if m.proxied is not None:
-            return m.proxied
-        if m.email == "proxy-maint@gentoo.org":
-            return "proxy"
-        if m.email.endswith("@gentoo.org"):
-            return "no"
-        return "yes"
-
-    def _check_maintainers(self, pkg, loc, doc):
+    @klass.jit_attr
+    def _projects(self):
+        """Frozen set of project emails defined by the target repo."""
+        return frozenset(self.options.target_repo.projects_xml.projects)
+
+    def _check_maintainers(self, pkg, fname, data, doc):
         """Validate maintainers in package metadata for the gentoo repo."""
         if self.options.gentoo_repo:
-            maintainer_needed = any(
-                c.text.strip() == "maintainer-needed" for c in doc.xpath("//comment()")
+            # iterate over all document comments, including ones outside the root
+            root = doc.getroot()
+            comments = chain(
+                root.itersiblings(etree.Comment, preceding=True),
+                root.iter(etree.Comment),
+                root.itersiblings(etree.Comment),
             )
+            maintainer_needed = any(c.text.strip() == "maintainer-needed" for c in comments)
             if pkg.maintainers:
                 # check for invalid maintainer-needed comment
                 if maintainer_needed:
-                    yield MaintainerNeeded(os.path.basename(loc), maintainer_needed, pkg=pkg)
+                    yield MaintainerNeeded(fname, maintainer_needed, pkg=pkg)
 
                 # determine proxy maintainer status
                 proxied, devs, proxies = [], [], []
-                proxy_map = {"yes": proxied, "no": devs, "proxy": proxies}
                 for m in pkg.maintainers:
-                    proxy_map[self._maintainer_proxied_key(m)].append(m)
+                    if (p := m.proxied) is None:
+                        if m.email == "proxy-maint@gentoo.org":
+                            proxies.append(m)
+                        elif m.email.endswith("@gentoo.org"):
+                            devs.append(m)
+                        else:
+                            proxied.append(m)
+                    elif p == "yes":
+                        proxied.append(m)
+                    elif p == "proxy":
+                        proxies.append(m)
+                    else:
+                        devs.append(m)
 
                 # check proxy maintainers
                 if not devs and not proxies:
                     maintainers = sorted(map(str, pkg.maintainers))
-                    yield MaintainerWithoutProxy(os.path.basename(loc), maintainers, pkg=pkg)
+                    yield MaintainerWithoutProxy(fname, maintainers, pkg=pkg)
                 elif not proxied and proxies:
-                    yield ProxyWithoutProxied(os.path.basename(loc), pkg=pkg)
+                    yield ProxyWithoutProxied(fname, pkg=pkg)
             elif not maintainer_needed:
                 # check for missing maintainer-needed comment
-                yield MaintainerNeeded(os.path.basename(loc), maintainer_needed, pkg=pkg)
+                yield MaintainerNeeded(fname, maintainer_needed, pkg=pkg)
 
             # check maintainer validity
-            if projects := set(pkg.repo.projects_xml.projects):
+            if projects := self._projects:
                 nonexistent = []
                 wrong_maintainers = []
                 for m in pkg.maintainers:
@@ -530,25 +598,26 @@ class PackageMetadataXmlCheck(_XmlBaseCheck):
                     elif m.maint_type == "person" and m.email in projects:
                         wrong_maintainers.append(m.email)
                 if nonexistent:
-                    yield NonexistentProjectMaintainer(
-                        os.path.basename(loc), sorted(nonexistent), pkg=pkg
-                    )
+                    yield NonexistentProjectMaintainer(fname, sorted(nonexistent), pkg=pkg)
                 if wrong_maintainers:
-                    yield WrongMaintainerType(
-                        os.path.basename(loc), sorted(wrong_maintainers), pkg=pkg
-                    )
+                    yield WrongMaintainerType(fname, sorted(wrong_maintainers), pkg=pkg)
 
-    def _check_longdescription(self, pkg, loc, doc):
+    def _check_longdescription(self, pkg, fname, data, doc):
         if pkg.longdescription is not None:
-            match_ratio = SequenceMatcher(None, pkg.description, pkg.longdescription).ratio()
-            if match_ratio > 0.75:
+            matcher = SequenceMatcher(None, pkg.description, pkg.longdescription)
+            # cheaper upper bounds avoid computing the full ratio in most cases
+            if (
+                matcher.real_quick_ratio() > 0.75
+                and matcher.quick_ratio() > 0.75
+                and matcher.ratio() > 0.75
+            ):
                 msg = "metadata.xml longdescription closely matches DESCRIPTION"
                 yield RedundantLongDescription(msg, pkg=pkg)
             elif len(pkg.longdescription) < 100:
                 msg = "metadata.xml longdescription is too short"
                 yield RedundantLongDescription(msg, pkg=pkg)
 
-    def _check_restricts(self, pkg, loc, doc):
+    def _check_restricts(self, pkg, fname, data, doc):
         restricts = (
             c.get("restrict")
             for path in ("maintainer", "use/flag")
@@ -568,16 +637,16 @@ class PackageMetadataXmlCheck(_XmlBaseCheck):
             except MalformedAtom as exc:
                 yield InvalidMetadataRestrict(restrict_str, exc, pkg=pkg)
 
-    def _check_remote_id(self, pkg, loc, doc):
+    def _check_remote_id(self, pkg, fname, data, doc):
         for u in pkg.upstreams:
             # empty values are already reported as PkgMetadataXmlEmptyElement
             if not u.name:
                 continue
             try:
-                validator, expected = self.remote_id_validators[u.type]
+                match, expected = self._remote_id_matchers[u.type]
             except KeyError:  # pragma: no cover
                 continue
-            if not validator.match(u.name):
+            if not match(u.name):
                 yield InvalidRemoteID(u.type, u.name, expected, pkg=pkg)
 
     def _get_xml_location(self, pkg):
@@ -2,6 +2,7 @@
 
 from collections import deque
 from functools import partial
+from operator import attrgetter
 
 from pkgcore.package.errors import MetadataException
 from pkgcore.restrictions import packages
@@ -25,7 +26,7 @@ class CheckRunner:
     def __init__(self, options, source, checks):
         self.options = options
         self.source = source
-        self.checks = sorted(checks)
+        self.checks = sorted(checks, key=attrgetter("sort_key"))
 
 
 class SyncCheckRunner(CheckRunner):
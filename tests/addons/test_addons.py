@@ -1,10 +1,14 @@
+import json
 import os
 from unittest.mock import patch
 
 import pytest
 from pkgcheck import addons
+from pkgcheck.addons import caches
 from pkgcheck.base import PkgcheckUserException
-from pkgcore.restrictions import packages
+from pkgcore.ebuild.atom import atom
+from pkgcore.ebuild.misc import ChunkedDataDict, chunked_data
+from pkgcore.restrictions import packages, values
 from snakeoil.osutils import pjoin
 
 from ..misc import FakePkg, FakeProfile, Profile
@@ -178,7 +182,12 @@ class TestProfileAddon:
         self.args = ["scan", "--cache-dir", str(tmp_path), "--repo", repo.location]
 
     def assertProfiles(self, addon, key, *profile_names):
-        actual = sorted(x.name for y in addon.profile_evaluate_dict[key] for x in y)
+        actual = sorted(
+            x.name
+            for use_grp in addon.profile_evaluate_dict[key]
+            for _visible, profiles in use_grp
+            for x in profiles
+        )
         expected = sorted(profile_names)
         assert actual == expected
 
@@ -322,6 +331,149 @@ class TestProfileAddon:
         assert addon.get("foo", ["foo"]) == ["foo"]
         assert addon.get("foo") is None
 
+    @pytest.fixture(params=["json", "orjson"])
+    def json_backend(self, request):
+        """Run a test with both the stdlib json module and orjson."""
+        if request.param == "orjson":
+            pytest.importorskip("orjson")
+            yield
+        else:
+            with patch("pkgcheck.addons.profiles.orjson", None):
+                yield
+
+    def test_cache(self, json_backend):
+        self.repo.create_profiles([Profile("default-linux", "x86")])
+        self.repo.arches.add("x86")
+        profile_dir = pjoin(self.repo.location, "profiles", "default-linux")
+        with open(pjoin(profile_dir, "package.mask"), "w") as f:
+            f.write("cat/masked\n")
+        with open(pjoin(profile_dir, "package.use.mask"), "w") as f:
+            f.write(">=cat/pkg-1 foo -bar\n")
+        with open(pjoin(profile_dir, "package.provided"), "w") as f:
+            f.write("cat/provided-1\n")
+        options, _ = self.tool.parse_args(self.args)
+
+        # generate the cache then reload it
+        addon = addons.init_addon(self.addon_kls, options)
+        (cache_file,) = addon.existing_caches["profiles"]
+        with open(cache_file, "rb") as f:
+            cache = addon._load(f)
+        assert cache.version == self.addon_kls.cache.version
+        assert set(cache) == {"default-linux"}
+        cached_addon = addons.init_addon(self.addon_kls, options)
+        for key in ("x86", "~x86"):
+            (p1,), (p2,) = addon[key], cached_addon[key]
+            assert p1.name == p2.name
+            assert p1.masked_use == p2.masked_use
+            assert p1.forced_use == p2.forced_use
+            assert p1.pkg_use == p2.pkg_use
+            assert p1.iuse_effective == p2.iuse_effective
+            assert p1.use == p2.use
+            assert p2.provides_has_match(atom("=cat/provided-1"))
+            pkg = FakePkg("cat/masked-1", data={"KEYWORDS": "x86"})
+            assert not p2.visible(pkg)
+
+        # cached entries from outdated versions are dropped
+        addon.save_cache(caches.DictCache(cache, caches.CacheData("profiles", "", 0)), cache_file)
+        assert addon.load_cache(cache_file) is None
+        assert not os.path.exists(cache_file)
+
+    def test_cache_chunk_keys(self, json_backend):
+        profiles = addons.profiles
+        data = ChunkedDataDict()
+        data.add_bare_global(("foo",), ())
+        data.add(chunked_data(atom(">=cat/pkg-1"), ("bar",), ()))
+        data.freeze()
+        encoded = profiles._json_loads(profiles._json_dumps(profiles._encode_chunked_data(data)))
+        assert profiles._decode_chunked_data(encoded) == data
+
+        # only atom and global restrictions are supported
+        restrict = packages.PackageRestriction("category", values.StrExactMatch("cat"))
+        data = ChunkedDataDict()
+        data.add(chunked_data(restrict, ("baz",), ()))
+        data.freeze()
+        with pytest.raises(TypeError):
+            profiles._encode_chunked_data(data)
+        with pytest.raises(ValueError):
+            profiles._decode_chunked_data([[[["pickle", ""], [], []]], {}])
+
+    def test_cache_chunked_data_layout(self):
+        # cached chunked data is restored by setting ChunkedDataDict internals
+        # directly, fail loudly if pkgcore changes them
+        assert ChunkedDataDict.__attr_comparison__ == ("_global_settings", "_dict")
+        profiles = addons.profiles
+        data = ChunkedDataDict()
+        data.add_bare_global(("foo",), ("bar",))
+        data.add(chunked_data(atom(">=cat/pkg-1"), ("bar",), ()))
+        data.add_bare_global((), ("baz",))
+        data.freeze()
+        decoded = profiles._decode_chunked_data(profiles._encode_chunked_data(data))
+        assert decoded.frozen
+        assert decoded == data
+        assert profiles._chunked_data_key(decoded) == profiles._chunked_data_key(data)
+        for cpv in ("cat/pkg-0", "cat/pkg-1", "cat/other-1"):
+            pkg = FakePkg(cpv)
+            assert decoded.pull_data(pkg) == data.pull_data(pkg)
+
+    def test_cache_legacy_file(self):
+        self.repo.create_profiles([Profile("default-linux", "x86")])
+        self.repo.arches.add("x86")
+        options, _ = self.tool.parse_args(self.args)
+        addon = addons.init_addon(self.addon_kls, options)
+        (cache_file,) = addon.existing_caches["profiles"]
+        legacy_file = pjoin(os.path.dirname(cache_file), "profiles.pickle")
+        with open(legacy_file, "wb") as f:
+            f.write(b"")
+
+        # pickled caches from earlier releases are removed on regen
+        os.remove(cache_file)
+        addons.init_addon(self.addon_kls, options)
+        assert os.path.exists(cache_file)
+        assert not os.path.exists(legacy_file)
+
+    def test_cache_undecodable_entry(self):
+        self.repo.create_profiles([Profile("default-linux", "x86")])
+        self.repo.arches.add("x86")
+        options, _ = self.tool.parse_args(self.args)
+        addon = addons.init_addon(self.addon_kls, options)
+        (cache_file,) = addon.existing_caches["profiles"]
+        with open(cache_file, "rb") as f:
+            data = json.loads(f.read())
+        data["profiles"]["default-linux"]["pkg_use"] = [[], {"cat": [[["foo", "bar"], [], []]]}]
+        with open(cache_file, "w") as f:
+            json.dump(data, f)
+
+        # only the undecodable entry is dropped, not the entire cache
+        with open(cache_file, "rb") as f:
+            cache = addon._load(f)
+        assert cache.version == self.addon_kls.cache.version
+        assert "default-linux" not in cache
+
+    def test_profile_visibility(self):
+        profiles = [
+            Profile("default-linux", "x86"),
+            Profile("default-linux/x86", "x86"),
+        ]
+        self.repo.create_profiles(profiles)
+        self.repo.arches.add("x86")
+        with open(pjoin(self.repo.location, "profiles", "default-linux", "package.mask"), "w") as f:
+            f.write("d-b/ab\n")
+        options, _ = self.tool.parse_args(self.args)
+        addon = addons.init_addon(self.addon_kls, options)
+
+        # profiles share USE settings but not visibility filters
+        assert len(addon.profile_evaluate_dict["x86"]) == 1
+        assert len(addon.profile_evaluate_dict["x86"][0]) == 2
+
+        groups = addon.identify_profiles(FakePkg("d-b/ab-1", data={"KEYWORDS": "x86"}))
+        assert [[x.name for x in group] for group in groups] == [
+            ["default-linux/x86"],
+            ["default-linux/x86"],
+        ]
+        groups = addon.identify_profiles(FakePkg("d-b/cd-1", data={"KEYWORDS": "x86"}))
+        assert len(groups) == 2
+        assert sorted(x.name for x in groups[0]) == ["default-linux", "default-linux/x86"]
+
     def test_profile_collapsing(self):
         profiles = [
             Profile("default-linux", "x86"),
@@ -336,7 +488,9 @@ class TestProfileAddon:
         # assert they're collapsed properly.
         self.assertProfiles(addon, "x86", "default-linux", "default-linux/x86")
         assert len(addon.profile_evaluate_dict["x86"]) == 1
-        assert len(addon.profile_evaluate_dict["x86"][0]) == 2
+        # profiles sharing visibility filters are bucketed together
+        assert len(addon.profile_evaluate_dict["x86"][0]) == 1
+        assert len(addon.profile_evaluate_dict["x86"][0][0][1]) == 2
         self.assertProfiles(addon, "ppc", "default-linux/ppc")
 
         groups = addon.identify_profiles(FakePkg("d-b/ab-1", data={"KEYWORDS": "x86"}))
@@ -360,6 +514,28 @@ class TestProfileAddon:
         assert len(groups) == 0, f"checking for profile collapsing: {groups!r}"
 
 
+class TestUseAddon:
+    def test_nested_sibling_conditionals(self, tool, repo):
+        options, _ = tool.parse_args(["scan", "--repo", repo.location])
+        addon = addons.UseAddon(options)
+        pkg = FakePkg(
+            "cat/pkg-1",
+            data={
+                "EAPI": "7",
+                "IUSE": "a b c",
+                "RDEPEND": "a? ( b? ( cat/x ) c? ( cat/y ) ) cat/z",
+            },
+        )
+        vals, _ = addon.use_validate((atom,), pkg, pkg.rdepend, attr="rdepend")
+        restricts = {str(k): [sorted(x.vals) for x in v] for k, v in vals.items()}
+        # sibling conditionals only carry their own ancestors' restrictions
+        assert restricts == {
+            "cat/x": [["a"], ["b"]],
+            "cat/y": [["a"], ["c"]],
+            "cat/z": [],
+        }
+
+
 try:
     import requests
 
@@ -1,4 +1,6 @@
+import copy
 import os
+import pickle
 import subprocess
 from functools import partial
 from unittest.mock import Mock, patch
@@ -13,6 +15,7 @@ from pkgcore.ebuild.atom import atom as atom_cls
 from pkgcore.restrictions import packages
 from snakeoil.cli.exceptions import UserException
 from snakeoil.fileutils import touch
+from snakeoil.mappings import ImmutableDict
 from snakeoil.osutils import pjoin
 from snakeoil.process import CommandNotFound, find_binary
 
@@ -229,6 +232,29 @@ class TestGitStash:
                 touch(path)
 
 
+class TestGitCommit:
+    def test_pickle_and_copy(self):
+        commit = git.GitCommit(
+            "7f9abd7ec2d",
+            1613438722,
+            "First Last <first.last@email.com>",
+            "First Last <first.last@email.com>",
+            ["cat/pkg: summary"],
+            ImmutableDict({"A": {atom_cls("=cat/pkg-1")}}),
+        )
+        for obj in (pickle.loads(pickle.dumps(commit)), copy.copy(commit), copy.deepcopy(commit)):
+            assert obj == commit
+            assert obj.commit_time == commit.commit_time
+            assert obj.author == commit.author
+            assert obj.committer == commit.committer
+            assert obj.message == commit.message
+            assert obj.pkgs == commit.pkgs
+
+        # objects stay immutable
+        with pytest.raises(AttributeError):
+            commit.hash = "foo"
+
+
 class TestGitRepoCommits:
     def test_non_git(self, tmp_path):
         with pytest.raises(git.GitError, match="failed running git log"):
@@ -304,6 +330,30 @@ class TestGitRepoCommits:
             assert len(commits) == 7
             assert commits[0].pkgs == {}
 
+    def test_multiline_message(self, make_git_repo):
+        git_repo = make_git_repo()
+        touch(pjoin(git_repo.path, "foo"))
+        git_repo.run(["git", "add", "foo"])
+        # keep trailing whitespace in the stored message
+        msg = "foo  \n\nbody text \n\nSigned-off-by: First Last <first.last@email.com>"
+        git_repo.run(["git", "commit", "--cleanup=verbatim", "-m", msg])
+        commits = list(git.GitRepoCommits(git_repo.path, "HEAD"))
+        assert len(commits) == 1
+        assert commits[0].message == [
+            "foo",
+            "",
+            "body text",
+            "",
+            "Signed-off-by: First Last <first.last@email.com>",
+        ]
+
+    def test_process_reaped(self, make_git_repo):
+        git_repo = make_git_repo()
+        git_repo.add("foo", msg="foo", create=True)
+        commits = git.GitRepoCommits(git_repo.path, "HEAD")
+        assert len(list(commits)) == 1
+        assert commits.git_log.proc.returncode == 0
+
 
 class TestGitRepoPkgs:
     def test_non_git(self, tmp_path):
@@ -493,6 +543,10 @@ class TestGitAddon:
             assert not self.addon.gitignored("foo.swp")
             assert not self.addon.gitignored(pjoin(self.repo.location, "foo.swp"))
 
+        # path matches are cached
+        assert self.addon._gitignored_cache[".foo.swp"]
+        assert not self.addon._gitignored_cache["foo.swp"]
+
     def test_cache_disabled(self, tool):
         args = ["scan", "--cache", "no", "--repo", self.repo.location]
         options, _ = tool.parse_args(args)
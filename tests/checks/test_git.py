@@ -65,6 +65,11 @@ class TestGitCommitMessageCheck(ReportTestCase):
             ),
         )
 
+        # sign offs from earlier commits aren't carried over to later ones
+        r = self.assertReport(self.check, (self.SO_commit(), FakeCommit(message=["summary"])))
+        assert isinstance(r, git_mod.MissingSignOff)
+        assert r.missing_sign_offs == ("author@domain.com",)
+
     def SO_commit(self, summary="summary", body="", tags=(), **kwargs):
         """Create a commit object from summary, body, and tags components."""
         author = kwargs.pop("author", "author@domain.com")
@@ -105,15 +110,12 @@ class TestGitCommitMessageCheck(ReportTestCase):
         for tag in ("Fixes", "Reverts"):
             # no results on `git cat-file` failure
             with patch("pkgcheck.checks.git.subprocess.Popen") as git_cat:
-                # force using a new `git cat-file` process for each iteration
-                self.check._git_cat_file = None
                 git_cat.return_value.poll.return_value = -1
                 commit = self.SO_commit(tags=[f"{tag}: {ref}"])
                 self.assertNoReport(self.check, commit)
 
             # missing and ambiguous object refs
             for status in ("missing", "ambiguous"):
-                self.check._git_cat_file = None
                 with patch("pkgcheck.checks.git.subprocess.Popen") as git_cat:
                     git_cat.return_value.poll.return_value = None
                     git_cat.return_value.stdout.readline.return_value = f"{ref} {status}"
@@ -124,12 +126,34 @@ class TestGitCommitMessageCheck(ReportTestCase):
 
             # valid tag reference
             with patch("pkgcheck.checks.git.subprocess.Popen") as git_cat:
-                self.check._git_cat_file = None
                 git_cat.return_value.poll.return_value = None
                 git_cat.return_value.stdout.readline.return_value = f"{ref} commit 1234"
                 commit = self.SO_commit(tags=[f"{tag}: {ref}"])
                 self.assertNoReport(self.check, commit)
 
+            # invalid references aren't queried
+            with patch("pkgcheck.checks.git.subprocess.Popen") as git_cat:
+                commit = self.SO_commit(tags=[f"{tag}: foo"])
+                r = self.assertReport(self.check, commit)
+                assert isinstance(r, git_mod.InvalidCommitTag)
+                assert "invalid format" in r.error
+                git_cat.assert_not_called()
+
+    def test_commit_tags_shared_process(self):
+        ref = "d8337304f09"
+        commits = tuple(self.SO_commit(tags=[f"{tag}: {ref}"]) for tag in ("Fixes", "Reverts"))
+
+        with patch("pkgcheck.checks.git.subprocess.Popen") as git_cat:
+            git_cat.return_value.poll.return_value = None
+            git_cat.return_value.stdout.readline.return_value = f"{ref} commit 1234"
+            self.assertNoReport(self.check, commits)
+            # one `git cat-file` process is used for all commits in a run
+            git_cat.assert_called_once()
+            assert git_cat.return_value.stdin.write.call_count == 2
+            # and it's shut down when the run finishes
+            git_cat.return_value.stdin.close.assert_called_once()
+            assert self.check._git_cat_file is None
+
     def test_summary_length(self):
         self.assertNoReport(self.check, self.SO_commit("single summary headline"))
         self.assertNoReport(self.check, self.SO_commit("a" * 69))
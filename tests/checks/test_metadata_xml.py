@@ -0,0 +1,41 @@
+from pkgcheck.checks import metadata_xml
+from pkgcheck.results import PackageResult, Warning
+from snakeoil.osutils import pjoin
+
+from ..misc import init_check
+
+
+class _ExtraMetadataXmlResult(PackageResult, Warning):
+    """Result used to verify subclassed content checks run."""
+
+    desc = "extra metadata.xml check"
+
+
+class TestMetadataXmlSubclass:
+    def test_subclass_checks(self, tool, make_repo):
+        class ExtraMetadataXmlCheck(metadata_xml.PackageMetadataXmlCheck):
+            known_results = metadata_xml.PackageMetadataXmlCheck.known_results | frozenset(
+                [_ExtraMetadataXmlResult]
+            )
+
+            def _check_extra(self, pkg, fname, data, doc):
+                yield _ExtraMetadataXmlResult(pkg=pkg)
+
+        repo = make_repo()
+        repo.create_ebuild("cat/pkg-1")
+        with open(pjoin(repo.location, "cat", "pkg", "metadata.xml"), "w") as f:
+            f.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<!DOCTYPE pkgmetadata SYSTEM "https://www.gentoo.org/dtd/metadata.dtd">\n'
+                "<pkgmetadata>\n</pkgmetadata>\n"
+            )
+        options, _ = tool.parse_args(["scan", "--repo", repo.location])
+        check, _, _ = init_check(ExtraMetadataXmlCheck, options)
+
+        # only bound check methods are collected from the subclass
+        assert all(callable(x) for x in check._checks)
+        assert "_check_extra" in ExtraMetadataXmlCheck._content_check_names
+        repo.sync()
+        pkgs = list(repo)
+        results = list(check.feed(pkgs))
+        assert [type(x) for x in results] == [_ExtraMetadataXmlResult]